@@ -3,30 +3,63 @@
 """
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 from datetime import datetime
+import io
 import logging
+import threading
 from pathlib import Path
-import pandas as pd
 
 from logic.data_loader import DataLoader
 from logic.analyzer import Analyzer
 from logic.plotter import ScatterPlotter
 
+# ファイル名に使えない文字を削除する変換テーブル
+_FILENAME_SANITIZE_TABLE = str.maketrans('', '', '\\/:*?"<>|')
+
+# 表示設定変更から再描画までの待ち時間（ミリ秒）。連続した変更は1回の描画にまとめる
+REDRAW_DELAY_MS = 150
+
+# 保存画像の解像度
+SAVE_DPI = 300
+
+# カテゴリ候補から除外する座標列
+_AXIS_COLUMNS = frozenset({'X', 'Y'})
+
+def _sanitize_filename(text):
+    """ファイル名に使えない文字を除去（空になった場合は 'unnamed'）"""
+    return text.translate(_FILENAME_SANITIZE_TABLE).strip() or 'unnamed'
+
+def _file_signature(path):
+    """ファイルの更新時刻(ns)とサイズを取得（パス未指定・存在しない場合はNone）"""
+    if not path:
+        return None
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
 class MainWindow:
     def __init__(self, root):
         self.root = root
         self.root.title("Auto Scattering Ver 6.0")
         self.root.geometry("1200x800")
         
-        # ビジネスロジック初期化
+        # ビジネスロジック初期化（プロッターはフォント走査を伴うため初回描画時に生成）
         self.loader = DataLoader()
         self.analyzer = Analyzer()
-        self.plotter = ScatterPlotter()
+        self._plotter = None
         
         # データ保持
         self.df = None
+        self._df_cache = {}
+        self._saving = False
+        self._last_category_cols = None
+        self.result = None
+        # self.result を計算したデータ（同じデータの再分析を省略する判定に使う）
+        self._analyzed_df = None
+        self._pending_redraw = None
+        self._loading = False
         self.scatter_path = "data/scatter.csv"
         self.category_path = None
         
@@ -34,14 +67,26 @@ class MainWindow:
         self._create_layout()
         self._load_initial_data()
     
+    @property
+    def plotter(self):
+        """散布図プロッター（初回アクセス時に生成）"""
+        if self._plotter is None:
+            self._plotter = ScatterPlotter()
+        return self._plotter
+    
     def _create_layout(self):
         """レイアウト構築"""
         # ========== 左ペイン: Canvas ==========
         left_frame = tk.Frame(self.root, bg='white')
         left_frame.pack(side='left', fill='both', expand=True)
         
-        # Matplotlibキャンバス
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
+        # Matplotlibキャンバス（matplotlibはここで初めて読み込む）
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        
+        # レイアウトは constrained layout で描画時に自動調整（毎回の tight_layout は不要）
+        self.fig = Figure(figsize=(8, 6), layout='constrained')
+        self.ax = self.fig.add_subplot()
         self.canvas = FigureCanvasTkAgg(self.fig, left_frame)
         self.canvas.get_tk_widget().pack(fill='both', expand=True, padx=5, pady=5)
         
@@ -88,6 +133,10 @@ class MainWindow:
         self.y_max_entry = tk.Entry(y_frame, width=8)
         self.y_max_entry.pack(side='left', padx=2)
         
+        # 軸範囲はEnterで即時反映（データの再読み込みは行わない）
+        for entry in (self.x_min_entry, self.x_max_entry, self.y_min_entry, self.y_max_entry):
+            entry.bind('<Return>', lambda event: self._schedule_redraw())
+        
         # --- 表示設定セクション ---
         section3 = tk.LabelFrame(right_frame, text="表示設定", padx=10, pady=10)
         section3.pack(fill='x', pady=5)
@@ -95,7 +144,8 @@ class MainWindow:
         # 回帰線ON/OFF
         self.show_regression = tk.BooleanVar(value=True)
         tk.Checkbutton(section3, text="回帰線を表示", 
-                       variable=self.show_regression).pack(anchor='w')
+                       variable=self.show_regression,
+                       command=self._toggle_regression).pack(anchor='w')
         
         # カテゴリ選択
         cat_frame = tk.Frame(section3)
@@ -106,6 +156,7 @@ class MainWindow:
                                             state='readonly', width=15)
         self.category_combo['values'] = ["なし"]
         self.category_combo.pack(side='left', padx=5)
+        self.category_combo.bind('<<ComboboxSelected>>', lambda event: self._schedule_redraw())
         
         # --- アクションボタン ---
         btn_frame = tk.Frame(right_frame)
@@ -136,21 +187,37 @@ class MainWindow:
         scrollbar.config(command=self.result_text.yview)
     
     def _load_initial_data(self):
-        """起動時のデータ読み込み"""
+        """起動時のデータ読み込み（CSVの読み込みはバックグラウンドで行う）"""
+        if Path(self.scatter_path).exists():
+            self.scatter_label.config(text=Path(self.scatter_path).name, fg='green')
+            self._show_result("データ読み込み中...")
+            self._loading = True
+            threading.Thread(target=self._background_load, daemon=True).start()
+        else:
+            self._show_result("データファイルが見つかりません。\n'data/scatter.csv' を配置してください。")
+            logging.warning("初期データファイルが存在しません")
+    
+    def _background_load(self):
+        """初期データ読み込み（ワーカースレッド）"""
         try:
-            from pathlib import Path
-            if Path(self.scatter_path).exists():
-                self.df = self.loader.load(self.scatter_path, self.category_path)
-                self.scatter_label.config(text=Path(self.scatter_path).name, fg='green')
-                self._update_category_combo()
-                self._update_plot()
-                logging.info(f"初期データ読み込み成功: {len(self.df)}件")
-            else:
-                self._show_result("データファイルが見つかりません。\n'data/scatter.csv' を配置してください。")
-                logging.warning("初期データファイルが存在しません")
+            self._load_data()
+            error = None
         except Exception as e:
-            messagebox.showerror("エラー", f"初期データ読み込み失敗:\n{e}")
             logging.error(f"初期データ読み込みエラー: {e}", exc_info=True)
+            error = e
+        self.root.after(0, self._finish_initial_load, error)
+    
+    def _finish_initial_load(self, error):
+        """初期データ読み込み完了後の分析・描画（メインスレッド）"""
+        self._loading = False
+        if error is not None:
+            self._show_result("")
+            messagebox.showerror("エラー", f"初期データ読み込み失敗:\n{error}")
+            return
+        # 読み込み済みのデータはキャッシュから取得される
+        if self._reload_data():
+            self._redraw()
+            logging.info(f"初期データ読み込み成功: {len(self.df)}件")
     
     def _select_scatter_file(self):
         """散布図データファイル選択"""
@@ -163,6 +230,7 @@ class MainWindow:
             self.scatter_path = path
             self.scatter_label.config(text=Path(path).name, fg='green')
             logging.info(f"散布図データ選択: {path}")
+            self._update_plot()
     
     def _select_category_file(self):
         """カテゴリデータファイル選択"""
@@ -178,6 +246,8 @@ class MainWindow:
         else:
             self.category_path = None
             self.category_label.config(text="未選択", fg='gray')
+        if self.df is not None:
+            self._update_plot()
     
     def _update_category_combo(self):
         """カテゴリコンボボックスを更新"""
@@ -185,7 +255,11 @@ class MainWindow:
             return
         
         # カテゴリ列を検出（X, Y以外の列）
-        category_cols = [col for col in self.df.columns if col not in ['X', 'Y']]
+        category_cols = [col for col in self.df.columns if col not in _AXIS_COLUMNS]
+        if category_cols == self._last_category_cols:
+            # 列構成が前回と同じならウィジェット更新は不要
+            return
+        self._last_category_cols = category_cols
         values = ["なし"] + category_cols
         self.category_combo['values'] = values
         
@@ -200,14 +274,66 @@ class MainWindow:
                 self.category_var.set("なし")
     
     def _update_plot(self):
-        print("利用可能なカラム:", self.df.columns.tolist())
-        print("先頭データ:\n", self.df.head())
-        """散布図を更新"""
+        """散布図を更新（ファイルから再読み込みして再描画）"""
+        if self._loading:
+            # 初期データ読み込み中（完了時に最新の設定で描画される）
+            return
+        if self._reload_data():
+            self._redraw()
+    
+    def _reload_data(self):
+        """
+        データを再読み込みして回帰分析を行う
+        
+        Returns:
+            bool: 読み込みに成功したか（回帰分析に失敗しても散布図は描画する）
+        """
         try:
-            # データ再読み込み
-            self.df = self.loader.load(self.scatter_path, self.category_path)
+            # データ再読み込み（ファイルが変更されていなければキャッシュを使用）
+            df = self._load_data()
+            if df is self._analyzed_df:
+                # 同じデータは分析済みのため再分析しない
+                return True
+            # 新しいデータに前のデータの分析結果を組み合わせない
+            self.df = df
+            self.result = None
+            self._analyzed_df = None
             self._update_category_combo()
             
+        except Exception as e:
+            messagebox.showerror("エラー", f"データ読み込み失敗:\n{e}")
+            logging.error(f"データ読み込みエラー: {e}", exc_info=True)
+            return False
+        
+        try:
+            # 回帰分析（結果は回帰線の描画にも再利用）
+            result = self.analyzer.analyze(df, 'X', 'Y')
+        except Exception as e:
+            # 回帰線なしで散布図は表示する
+            self._show_result(f"回帰分析できません:\n{e}")
+            messagebox.showerror("エラー", f"回帰分析失敗:\n{e}")
+            return True
+        
+        self.result = result
+        self._analyzed_df = df
+        self._show_result(self._format_result(result))
+        return True
+    
+    def _schedule_redraw(self):
+        """再描画を予約（待ち時間内の変更は1回の再描画にまとめる）"""
+        if self._pending_redraw is not None:
+            self.root.after_cancel(self._pending_redraw)
+        self._pending_redraw = self.root.after(REDRAW_DELAY_MS, self._redraw)
+    
+    def _redraw(self):
+        """現在のデータで散布図を再描画（表示設定の変更のみ反映）"""
+        if self._pending_redraw is not None:
+            self.root.after_cancel(self._pending_redraw)
+            self._pending_redraw = None
+        if self.df is None:
+            return
+        
+        try:
             # 軸範囲取得
             xlim = self._get_axis_range(self.x_min_entry, self.x_max_entry)
             ylim = self._get_axis_range(self.y_min_entry, self.y_max_entry)
@@ -215,6 +341,11 @@ class MainWindow:
             # カテゴリ取得
             category_col = None if self.category_var.get() == "なし" else self.category_var.get()
             
+            # 回帰分析に失敗したデータは回帰線を描画しない
+            regression = None
+            if self.result is not None:
+                regression = (self.result['slope'], self.result['intercept'])
+            
             # 描画
             self.plotter.draw(
                 self.ax, 
@@ -222,17 +353,15 @@ class MainWindow:
                 x_col='X', 
                 y_col='Y',
                 category_col=category_col,
-                show_regression=self.show_regression.get(),
+                show_regression=self.show_regression.get() and regression is not None,
                 xlim=xlim,
                 ylim=ylim,
                 show_labels=True,  # ラベル表示を有効に
-                label_col='LABEL'  # ラベルに使用する列名（適切な列名に変更してください）
+                label_col='LABEL',  # ラベルに使用する列名（適切な列名に変更してください）
+                regression=regression
             )
-            self.canvas.draw()
-            
-            # 分析結果表示
-            result = self.analyzer.analyze(self.df, 'X', 'Y')
-            self._show_result(self._format_result(result))
+            # 再描画はTkのアイドル時にまとめて実行（連続した更新を1回の描画にまとめる）
+            self.canvas.draw_idle()
             
             logging.info("散布図更新完了")
             
@@ -240,6 +369,23 @@ class MainWindow:
             messagebox.showerror("エラー", f"散布図更新失敗:\n{e}")
             logging.error(f"散布図更新エラー: {e}", exc_info=True)
     
+    def _load_data(self):
+        """データを読み込む（パス・更新時刻・サイズが同じならキャッシュを返す）"""
+        key = (self.scatter_path, _file_signature(self.scatter_path),
+               self.category_path, _file_signature(self.category_path))
+        if key not in self._df_cache:
+            # 古いキャッシュは破棄して最新の1件のみ保持
+            self._df_cache.clear()
+            self._df_cache[key] = self.loader.load(self.scatter_path, self.category_path)
+        return self._df_cache[key]
+    
+    def _toggle_regression(self):
+        """回帰線の表示切替（描画済みの回帰線があれば散布図を描き直さない）"""
+        if self.plotter.set_regression_visible(self.show_regression.get()):
+            self.canvas.draw_idle()
+        else:
+            self._redraw()
+    
     def _get_axis_range(self, min_entry, max_entry):
         """軸範囲を取得（空欄ならNone）"""
         try:
@@ -271,9 +417,8 @@ class MainWindow:
         """
     
     def _show_result(self, text):
-        """分析結果を表示"""
-        self.result_text.delete('1.0', 'end')
-        self.result_text.insert('1.0', text)
+        """分析結果を表示（既存内容を1回の操作で置き換える）"""
+        self.result_text.replace('1.0', 'end', text)
     
     def _save_image(self):
         """画像を保存"""
@@ -285,14 +430,50 @@ class MainWindow:
             # ファイル名生成
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             category = self.category_var.get() if self.category_var.get() != "なし" else "all"
+            category = _sanitize_filename(category)
             filename = f"X_Y_{category}_{timestamp}.png"
             filepath = f"output/{filename}"
             
-            # 保存
-            self.fig.savefig(filepath, dpi=300, bbox_inches='tight')
-            messagebox.showinfo("保存完了", f"画像を保存しました:\n{filepath}")
-            logging.info(f"画像保存: {filepath}")
+            if self._saving:
+                messagebox.showwarning("警告", "画像を保存中です")
+                return
+            
+            # 描画はTkスレッドで行い、表示中の図とワーカーが同時に触れないようにする
+            # constrained layout 済みのため bbox_inches='tight' による再レイアウトは不要
+            buf = io.BytesIO()
+            self.fig.savefig(buf, format='rgba', dpi=SAVE_DPI, bbox_inches=None)
+            width, height = (self.fig.get_size_inches() * SAVE_DPI).astype(int)
+            
+            # PNGエンコードのみバックグラウンドで行いGUIを止めない
+            self._saving = True
+            threading.Thread(target=self._save_worker,
+                             args=(filepath, buf.getvalue(), (width, height)),
+                             daemon=True).start()
             
         except Exception as e:
             messagebox.showerror("エラー", f"画像保存失敗:\n{e}")
-            logging.error(f"画像保存エラー: {e}", exc_info=True)
\ No newline at end of file
+            logging.error(f"画像保存エラー: {e}", exc_info=True)
+    
+    def _save_worker(self, filepath, rgba, size):
+        """描画済みのRGBAバッファをPNGに書き出す（ワーカースレッド）"""
+        try:
+            from PIL import Image
+            
+            # PNGは低圧縮で高速に書き出す（ファイルサイズより保存時間を優先）
+            image = Image.frombuffer('RGBA', size, rgba, 'raw', 'RGBA', 0, 1)
+            image.save(filepath, format='PNG', dpi=(SAVE_DPI, SAVE_DPI),
+                       optimize=False, compress_level=1)
+            error = None
+        except Exception as e:
+            logging.error(f"画像保存エラー: {e}", exc_info=True)
+            error = e
+        self.root.after(0, self._on_save_finished, filepath, error)
+    
+    def _on_save_finished(self, filepath, error):
+        """画像保存完了の通知（メインスレッド）"""
+        self._saving = False
+        if error is None:
+            messagebox.showinfo("保存完了", f"画像を保存しました:\n{filepath}")
+            logging.info(f"画像保存: {filepath}")
+        else:
+            messagebox.showerror("エラー", f"画像保存失敗:\n{error}")
\ No newline at end of file
@@ -1,9 +1,14 @@
 """
 アナライザー - 回帰分析処理
 """
-from scipy import stats
-import pandas as pd
+from __future__ import annotations
+
 import logging
+import numpy as np
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class Analyzer:
     """線形回帰分析を実行"""
@@ -27,18 +32,28 @@ class Analyzer:
         """
         try:
             # データ抽出
-            x = df[x_col].values
-            y = df[y_col].values
+            x = np.asarray(df[x_col].to_numpy(), dtype=np.float64)
+            y = np.asarray(df[y_col].to_numpy(), dtype=np.float64)
+            if len(x) < 2:
+                raise ValueError("回帰分析には2件以上のデータが必要です")
+            
+            # 線形回帰（平方和・積和からの閉形式）
+            x_mean, y_mean = x.mean(), y.mean()
+            dx, dy = x - x_mean, y - y_mean
+            sxx = dx @ dx
+            syy = dy @ dy
+            sxy = dx @ dy
+            if sxx == 0:
+                raise ValueError("X値がすべて同じため回帰直線を計算できません")
             
-            # 線形回帰
-            slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
+            slope = sxy / sxx
+            intercept = y_mean - slope * x_mean
+            r_squared = (sxy * sxy) / (sxx * syy) if syy != 0 else 0.0
             
             result = {
                 'slope': slope,
                 'intercept': intercept,
-                'r_squared': r_value ** 2,
-                'p_value': p_value,
-                'std_err': std_err,
+                'r_squared': r_squared,
                 'equation': self._format_equation(slope, intercept),
                 'n_samples': len(df)
             }
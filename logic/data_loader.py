@@ -1,10 +1,19 @@
 """
 データローダー - CSV読み込み処理
 """
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import codecs
+import io
 import logging
 
+# 読み込みを試すエンコーディング候補
+ENCODINGS = ['utf-8', 'cp932', 'shift_jis']
+# パーサーがバイト列のまま直接読めるエンコーディング
+_UTF8_ENCODINGS = frozenset({'utf-8', 'utf-8-sig'})
+
 class DataLoader:
     """CSVファイルを読み込んでDataFrameを返す"""
     
@@ -19,6 +28,14 @@ class DataLoader:
         Returns:
             pd.DataFrame: 結合されたデータ
         """
+        # カテゴリデータは散布図データと並行して読み込む（I/O待ちを重ねる）
+        category_future = None
+        if category_path and Path(category_path).exists():
+            pool = ThreadPoolExecutor(max_workers=1)
+            category_future = pool.submit(self._read_csv, category_path)
+            # 投入済みの読み込みは続行させ、散布図側のエラーは完了を待たずに送出する
+            pool.shutdown(wait=False)
+        
         # 1. 散布図データ読み込み
         df = self._read_csv(scatter_path)
         # 列名を大文字に統一して X/Y の検出をケースに依らず行えるようにする
@@ -34,20 +51,20 @@ class DataLoader:
         logging.info(f"数値クレンジング後: {len(df)}行")
         
         # 3. カテゴリデータの結合
-        if category_path and Path(category_path).exists():
+        if category_future is not None:
             try:
-                cat_df = self._read_csv(category_path)
+                cat_df = category_future.result()
                 
                 # 結合キーを自動検出（共通列名）を安定させるため、カテゴリデータの列名も大文字化
                 cat_df.columns = [str(col).upper() for col in cat_df.columns]
 
-                common_cols = set(df.columns) & set(cat_df.columns)
-                if common_cols:
-                    # 優先キーを ID があればそれを、なければ共通列のうち1つを選択
+                common_cols = df.columns.intersection(cat_df.columns)
+                if len(common_cols):
+                    # 優先キーを ID があればそれを、なければ共通列のうち名前順で最初の列を選択
                     if 'ID' in common_cols:
                         join_key = 'ID'
                     else:
-                        join_key = sorted(list(common_cols))[0]
+                        join_key = common_cols.sort_values()[0]
                     df = df.merge(cat_df, on=join_key, how='left')
                     logging.info(f"カテゴリデータ結合: キー={join_key}")
                 else:
@@ -67,20 +84,66 @@ class DataLoader:
         Returns:
             pd.DataFrame: 読み込んだデータ
         """
-        encodings = ['utf-8', 'cp932', 'shift_jis']
+        try:
+            # ディスクからの読み込みは1回だけ
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError as e:
+            raise ValueError(f"CSVファイル読み込み失敗: {path}") from e
+        
+        text, encoding = self._decode(raw)
+        if text is None:
+            raise ValueError(f"CSVファイル読み込み失敗: {path}（対応していない文字エンコーディング）")
+        
+        if encoding in _UTF8_ENCODINGS:
+            # UTF-8 はバイト列のまま解析する（再エンコードを避け、判定用の文字列は解放する）
+            text = None
+            df = self._read_csv_with_engine(io.BytesIO(raw), encoding)
+        else:
+            # それ以外はデコード済みの文字列をそのまま解析する
+            df = self._read_csv_with_engine(io.StringIO(text))
+        logging.info(f"CSV読み込み成功: {path} (encoding={encoding})")
+        return df
+    
+    def _decode(self, data: bytes) -> tuple:
+        """
+        バイト列を候補のエンコーディングで順にデコードする
+        
+        Args:
+            data: ファイルの内容
+        
+        Returns:
+            tuple: (デコードした文字列, エンコーディング)（どの候補でもデコードできない場合は (None, None)）
+        """
+        candidates = ['utf-8-sig'] if data.startswith(codecs.BOM_UTF8) else ENCODINGS
         
-        for encoding in encodings:
+        # 各候補でデコードを試し、最初に成功したものを採用
+        for encoding in candidates:
             try:
-                df = pd.read_csv(path, encoding=encoding)
-                logging.info(f"CSV読み込み成功: {path} (encoding={encoding})")
-                return df
-            except (UnicodeDecodeError, FileNotFoundError) as e:
-                if encoding == encodings[-1]:
-                    # 最後のエンコーディングでも失敗
-                    raise ValueError(f"CSVファイル読み込み失敗: {path}") from e
+                return data.decode(encoding), encoding
+            except UnicodeDecodeError:
                 continue
+        return None, None
+    
+    def _read_csv_with_engine(self, source, encoding: str = None) -> pd.DataFrame:
+        """
+        PyArrowエンジンでCSVを読み込む（未インストール・読み込み不可の場合はCエンジン）
+        
+        Args:
+            source: ファイル内容（UTF-8 のバイナリストリーム、またはデコード済みのテキストストリーム）
+            encoding: バイナリストリームの文字エンコーディング（テキストストリームの場合はNone）
         
-        raise ValueError(f"CSVファイル読み込み失敗: {path}")
+        Returns:
+            pd.DataFrame: 読み込んだデータ
+        """
+        try:
+            return pd.read_csv(source, encoding=encoding, engine='pyarrow')
+        except (ImportError, ValueError):
+            # pyarrow未インストール、またはpyarrowで扱えない入力はCエンジンで再試行
+            source.seek(0)
+        
+        # low_memory=False で列の型推論をチャンクごとでなく1回で行う
+        return pd.read_csv(source, encoding=encoding, engine='c', low_memory=False)
     
     def _clean_numeric_columns(self, df: pd.DataFrame, cols: list) -> pd.DataFrame:
         """
@@ -93,18 +156,17 @@ class DataLoader:
         Returns:
             pd.DataFrame: クレンジング後のデータ
         """
-        original_len = len(df)
-        
-        for col in cols:
-            if col in df.columns:
-                # 数値変換（変換できない値はNaNに）
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        cols = [col for col in cols if col in df.columns]
         
-        # NaNを含む行を削除
-        df = df.dropna(subset=cols)
+        # 数値変換（変換できない値はNaNに）を全列まとめて行う
+        coerced = df[cols].apply(pd.to_numeric, errors='coerce')
         
-        dropped = original_len - len(df)
+        # NaN・±infを含まない行だけを残す（to_numeric は inf を除外しないため）
+        mask = np.isfinite(coerced.to_numpy(dtype=np.float64)).all(axis=1)
+        dropped = int((~mask).sum())
         if dropped > 0:
-            logging.warning(f"{dropped}行をドロップしました（数値変換不可）")
+            logging.warning(f"{dropped}行をドロップしました（数値変換不可・無限大）")
         
+        df = df.loc[mask].copy()
+        df[cols] = coerced.loc[mask]
         return df
\ No newline at end of file
@@ -1,29 +1,55 @@
 """
 プロッター - 散布図描画処理
 """
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
-import pandas as pd
+from __future__ import annotations
+
 import logging
-from scipy import stats
+import numpy as np
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 日本語フォント候補（優先順: Windows, Mac）と見つからない場合のフォント
+JAPANESE_FONTS = ['Meiryo', 'Hiragino Sans']
+DEFAULT_FONT = 'DejaVu Sans'
+
+# ラベルを描画する最大データ数
+MAX_LABELED_POINTS = 200
+
+_plt = None
+
+def _lazy_mpl():
+    """matplotlib を初回使用時にだけ読み込む（起動時のインポートコスト回避）"""
+    global _plt
+    if _plt is None:
+        import matplotlib.pyplot as _plt
+    return _plt, _plt.rcParams
+
+@lru_cache(maxsize=None)
+def _system_font_names() -> frozenset:
+    """matplotlib に登録済みのフォントファミリー名を集合で返す"""
+    plt, _ = _lazy_mpl()
+    return frozenset(f.name for f in plt.matplotlib.font_manager.fontManager.ttflist)
+
+def _detect_font_family() -> str:
+    """日本語表示に使うフォント名を決定"""
+    font_names = _system_font_names()
+    return next((name for name in JAPANESE_FONTS if name in font_names), DEFAULT_FONT)
 
 class ScatterPlotter:
     """散布図を描画"""
     
     def __init__(self):
         """日本語フォント設定"""
+        plt, rcParams = _lazy_mpl()
+        # 直近の描画で作成した回帰線（表示切替で再利用）
+        self.regression_line = None
         try:
             # 日本語フォント設定（環境に応じて自動選択）
             rcParams['font.family'] = 'sans-serif'
-            # Windows
-            if 'Meiryo' in plt.matplotlib.font_manager.findSystemFonts():
-                rcParams['font.sans-serif'] = ['Meiryo']
-            # Mac
-            elif 'Hiragino Sans' in plt.matplotlib.font_manager.findSystemFonts():
-                rcParams['font.sans-serif'] = ['Hiragino Sans']
-            # その他
-            else:
-                rcParams['font.sans-serif'] = ['DejaVu Sans']
+            rcParams['font.sans-serif'] = [_detect_font_family()]
             
             logging.info("フォント設定完了")
         except Exception as e:
@@ -32,12 +58,7 @@ class ScatterPlotter:
     def draw(self, ax, df: pd.DataFrame, x_col: str = 'X', y_col: str = 'Y',
             category_col: str = None, show_regression: bool = True,
             xlim: tuple = None, ylim: tuple = None, show_labels: bool = True,
-            label_col: str = None):
-
-        # plotter.pyのdrawメソッドの先頭に追加
-        print("利用可能なカラム:", df.columns.tolist())
-        print(f"指定されたラベル列 '{label_col}' は存在するか:", label_col in df.columns)
-        print("先頭5行のラベルデータ:", df[label_col].head().tolist() if label_col in df.columns else "ラベル列が存在しません")
+            label_col: str = None, regression: tuple = None):
         """
         散布図を描画
     
@@ -52,10 +73,15 @@ class ScatterPlotter:
         ylim: Y軸の範囲 (min, max)
         show_labels: 各点にラベルを表示するか
         label_col: ラベルとして使用する列名（指定しない場合はインデックスを使用）
+        regression: 計算済みの回帰係数 (slope, intercept)（指定しない場合は回帰線を描画しない）
         """
+        logging.debug("利用可能なカラム: %s", df.columns)
+        logging.debug("ラベル列 '%s' の存在: %s", label_col, label_col in df.columns)
+        
         try:
             # 軸をクリア
             ax.clear()
+            self.regression_line = None
         
             # カテゴリ別に描画
             if category_col and category_col in df.columns:
@@ -64,8 +90,8 @@ class ScatterPlotter:
                 self._draw_simple(ax, df, x_col, y_col)
             
             # 回帰直線
-            if show_regression:
-                self._draw_regression_line(ax, df, x_col, y_col)
+            if show_regression and regression is not None:
+                self._draw_regression_line(ax, df, x_col, y_col, regression)
             
             # 軸ラベル
             ax.set_xlabel(x_col)
@@ -77,20 +103,19 @@ class ScatterPlotter:
             if ylim:
                 ax.set_ylim(ylim)
 
-            # 各点にラベルを表示
-            if show_labels:
+            # 各点にラベルを表示（点数が多すぎる場合は判読できないため省略）
+            if show_labels and len(df) <= MAX_LABELED_POINTS:
                 labels = df[label_col] if label_col and label_col in df.columns else df.index.astype(str)
-                for x, y, label in zip(df[x_col], df[y_col], labels):
+                bbox = dict(facecolor='white', alpha=0.7, edgecolor='none', pad=1)
+                for x, y, label in zip(df[x_col].to_numpy(), df[y_col].to_numpy(), labels.to_numpy()):
                     ax.text(x, y, str(label), 
                             fontsize=8, 
                             ha='center', 
                             va='bottom',
-                            bbox=dict(facecolor='white', alpha=0.7, 
-                                     edgecolor='none', pad=1),
+                            bbox=bbox,
                             transform=ax.transData)
-        
-            # レイアウト調整
-            ax.figure.tight_layout()
+            elif show_labels:
+                logging.info(f"データ数が{MAX_LABELED_POINTS}件を超えるためラベル表示を省略しました")
         
             logging.info("散布図描画完了")
         
@@ -98,40 +123,60 @@ class ScatterPlotter:
             logging.error(f"散布図描画エラー: {e}", exc_info=True)
             raise
     
+    def set_regression_visible(self, visible: bool) -> bool:
+        """
+        描画済みの回帰線の表示/非表示を切り替える
+        
+        Args:
+            visible: 表示するか
+        
+        Returns:
+            bool: 切り替えたか（回帰線が未描画の場合はFalse）
+        """
+        if self.regression_line is None:
+            return False
+        self.regression_line.set_visible(visible)
+        return True
+    
     def _draw_simple(self, ax, df: pd.DataFrame, x_col: str, y_col: str):
         """シンプルな散布図（カテゴリなし）"""
         ax.scatter(df[x_col], df[y_col], 
                   alpha=0.7, s=50, color='#2196F3', edgecolors='white', linewidths=0.5)
     
     def _draw_with_category(self, ax, df: pd.DataFrame, x_col: str, y_col: str, category_col: str):
-        """カテゴリ別散布図"""
-        categories = df[category_col].unique()
-        colors = plt.cm.tab10(range(len(categories)))
+        """カテゴリ別散布図（全カテゴリを1回のscatterで描画）"""
+        plt, _ = _lazy_mpl()
+        from matplotlib.lines import Line2D
         
-        for i, cat in enumerate(categories):
-            subset = df[df[category_col] == cat]
-            ax.scatter(subset[x_col], subset[y_col],
-                      alpha=0.7, s=50, label=str(cat), 
-                      color=colors[i], edgecolors='white', linewidths=0.5)
+        # カテゴリを整数コードに変換（欠損値は -1）
+        codes, categories = df[category_col].factorize()
+        palette = plt.cm.tab10(np.arange(len(categories)))
+        valid = codes >= 0
         
-        ax.legend(loc='best', framealpha=0.9)
+        ax.scatter(df[x_col].to_numpy()[valid], df[y_col].to_numpy()[valid],
+                   alpha=0.7, s=50, color=palette[codes[valid]],
+                   edgecolors='white', linewidths=0.5)
+        
+        # 凡例はカテゴリごとのマーカーから作成
+        handles = [Line2D([0], [0], marker='o', linestyle='', markersize=7,
+                          color=palette[i], markeredgecolor='white', alpha=0.7,
+                          label=str(cat))
+                   for i, cat in enumerate(categories)]
+        ax.legend(handles=handles, loc='best', framealpha=0.9)
     
-    def _draw_regression_line(self, ax, df: pd.DataFrame, x_col: str, y_col: str):
-        """回帰線を描画"""
+    def _draw_regression_line(self, ax, df: pd.DataFrame, x_col: str, y_col: str,
+                              regression: tuple):
+        """計算済みの回帰係数で回帰線を描画"""
         try:
             x = df[x_col].values
-            y = df[y_col].values
-            
-            # 回帰直線の計算
-            slope, intercept, _, _, _ = stats.linregress(x, y)
+            slope, intercept = regression
             
-            # 描画範囲
-            x_min, x_max = x.min(), x.max()
-            x_line = [x_min, x_max]
-            y_line = [slope * xi + intercept for xi in x_line]
+            # 描画範囲（端点2点のみのためPythonのスカラーで計算）
+            x_min, x_max = float(np.min(x)), float(np.max(x))
+            y_min, y_max = slope * x_min + intercept, slope * x_max + intercept
             
             # 回帰線描画
-            ax.plot(x_line, y_line, 'r-', alpha=0.6, linewidth=2.5, label='回帰線')
+            self.regression_line, = ax.plot([x_min, x_max], [y_min, y_max], 'r-', alpha=0.6, linewidth=2.5, label='回帰線')
             
         except Exception as e:
             logging.warning(f"回帰線描画失敗: {e}")
\ No newline at end of file
@@ -2,30 +2,24 @@
 Auto Scattering Ver 6.0 - メインエントリポイント
 """
 import tkinter as tk
-from gui.main_window import MainWindow
+import importlib.util
 import logging
-from pathlib import Path
-import os
 import sys
-import subprocess
-import platform
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+import queue
 
-def setup_virtualenv():
-    venv_dir = "venv"
-    
-    # 仮想環境が存在しない場合に作成
-    if not os.path.exists(venv_dir):
-        logging.info("仮想環境を作成しています...")
-        subprocess.check_call([sys.executable, '-m', 'venv', venv_dir])
-    
-    # 仮想環境をアクティベート
-    if platform.system() == "Windows":
-        activate_script = os.path.join(venv_dir, "Scripts", "activate.bat")
-        subprocess.call(f'cmd /c "{activate_script}" && pip install -r requirements.txt', shell=True)
-    else:
-        activate_script = os.path.join(venv_dir, "bin", "activate")
-        subprocess.call(f'source {activate_script} && pip install -r requirements.txt', shell=True)
-    logging.info("仮想環境のセットアップが完了しました。")
+# 起動に必要なライブラリ（requirements.txt と対応）
+REQUIRED_PACKAGES = ['pandas', 'matplotlib']
+
+def check_dependencies():
+    """必要なライブラリがインストールされているか確認（読み込みは行わない）"""
+    missing = [name for name in REQUIRED_PACKAGES if importlib.util.find_spec(name) is None]
+    if missing:
+        logging.error(f"必要なライブラリがインストールされていません: {', '.join(missing)}")
+        logging.error("pip install -r requirements.txt を実行してください")
+        return False
+    return True
 
 def setup_directories():
     """必要なディレクトリを作成"""
@@ -33,28 +27,45 @@ def setup_directories():
     Path("output").mkdir(exist_ok=True)
 
 def setup_logging():
-    """ログ設定"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('app.log', encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    """ログ設定（ファイル・コンソール出力はバックグラウンドスレッドで行う）"""
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler('app.log', encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+    listener.start()
+    return listener
 
 def main():
-    setup_logging()  # 最初にロギングを設定
-    setup_virtualenv()
-    setup_directories()
-    
-    logging.info("Auto Scattering Ver 6.0 起動")
-    
-    root = tk.Tk()
-    app = MainWindow(root)
-    root.mainloop()
-    
-    logging.info("アプリケーション終了")
+    listener = setup_logging()  # 最初にロギングを設定
+    try:
+        if not check_dependencies():
+            sys.exit(1)
+        setup_directories()
+        
+        logging.info("Auto Scattering Ver 6.0 起動")
+        
+        # 重いライブラリを読み込む前にウィンドウを表示する
+        root = tk.Tk()
+        root.title("Auto Scattering Ver 6.0")
+        loading_label = tk.Label(root, text="読み込み中...")
+        loading_label.pack(expand=True, padx=40, pady=40)
+        root.update()
+        
+        from gui.main_window import MainWindow
+        
+        loading_label.destroy()
+        app = MainWindow(root)
+        root.mainloop()
+        
+        logging.info("アプリケーション終了")
+    finally:
+        # キューに残ったログを書き出してから終了
+        listener.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file